@@ -1,9 +1,263 @@
+import asyncio
 import copy
-from ikomia import core, dataprocess
+from concurrent.futures import ThreadPoolExecutor
+import datetime
+import functools
+import hashlib
+import json
+import struct
+import tempfile
+from collections import OrderedDict
+from ikomia import core, dataprocess, utils
+from itertools import chain
+from google.auth.transport.requests import Request
+from google.oauth2 import service_account
+from google.api_core.exceptions import ResourceExhausted
 from google.cloud import vision
-import os
-import io
+from google.cloud.vision_v1.services.image_annotator.transports import (
+    ImageAnnotatorGrpcAsyncIOTransport,
+    ImageAnnotatorGrpcTransport,
+)
+from aiolimiter import AsyncLimiter
+from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_exponential
 import cv2
+import numpy as np
+import os
+from turbojpeg import TurboJPEG, TJPF_GRAY, TJPF_RGB, TJPF_RGBA, TJSAMP_GRAY, TJSAMP_420
+
+
+# Pixel format and chroma subsampling handed to TurboJPEG, by channel count.
+# Every Ikomia image layout has a native format, so no color conversion is needed.
+_PIXEL_FORMATS = {
+    1: (TJPF_GRAY, TJSAMP_GRAY),
+    3: (TJPF_RGB, TJSAMP_420),
+    4: (TJPF_RGBA, TJSAMP_420),
+}
+
+# OpenCV fallback encoder expects BGR
+_CV2_CONVERSIONS = {
+    3: cv2.COLOR_RGB2BGR,
+    4: cv2.COLOR_RGBA2BGR,
+}
+
+# Image files that can be uploaded as is, without decoding and re-encoding
+_SOURCE_FILE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp")
+
+# Vision API limit on inline image content
+_MAX_CONTENT_SIZE = 10 * 1024 * 1024
+
+# Maximum number of images per batch_annotate_images request
+_MAX_BATCH_SIZE = 16
+
+# Keep the gRPC connection alive between calls so later requests skip TLS handshake.
+# Pings are only sent while calls are active: idle pings every 30 s exceed the server
+# default of one per 5 minutes without calls and get the connection closed (too_many_pings)
+_CHANNEL_OPTIONS = [
+    ("grpc.keepalive_time_ms", 30000),
+    ("grpc.keepalive_timeout_ms", 10000),
+    ("grpc.http2.max_pings_without_data", 0),
+]
+
+# Access token persisted across process restarts (service account credentials only)
+_TOKEN_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "ikomia", "google_vision_token.json")
+
+# Tokens written to disk only grant the Vision API, not the whole project (cloud-platform)
+_TOKEN_SCOPES = ("https://www.googleapis.com/auth/cloud-vision",)
+
+# Vision clients shared by all task instances, keyed by credentials path
+_CLIENT_CACHE = {}
+
+# Request confidence scores along with detected text
+_IMAGE_CONTEXT = vision.ImageContext(
+                        text_detection_params=vision.TextDetectionParams(
+                                enable_text_detection_confidence_score=True
+                        )
+)
+
+
+@functools.lru_cache(maxsize=None)
+def _get_turbojpeg():
+    # libturbojpeg is a system library that pip does not install:
+    # return None when it cannot be loaded so that encoding falls back to OpenCV
+    try:
+        return TurboJPEG()
+    except (RuntimeError, OSError):
+        return None
+
+
+def _content_key(content, dense_document):
+    # Responses differ between detection modes: hash them apart
+    person = b"document" if dense_document else b"text"
+    return hashlib.blake2b(content, digest_size=16, person=person).digest()
+
+
+def _jpeg_orientation(segment):
+    # EXIF orientation tag of an APP1 segment payload, 1 (upright) when absent
+    if segment[:6] != b"Exif\x00\x00":
+        return 1
+    tiff = segment[6:]
+    order = "<" if tiff[:2] == b"II" else ">"
+    try:
+        ifd = struct.unpack(order + "I", tiff[4:8])[0]
+        count = struct.unpack(order + "H", tiff[ifd:ifd + 2])[0]
+        for i in range(count):
+            entry = ifd + 2 + 12 * i
+            tag, = struct.unpack(order + "H", tiff[entry:entry + 2])
+            if tag == 0x0112:
+                return struct.unpack(order + "H", tiff[entry + 8:entry + 10])[0]
+    except struct.error:
+        return None
+    return 1
+
+
+def _image_size(data):
+    # (height, width) of an encoded image read from its header, without decoding.
+    # None when unknown, or when the decoder would rotate it (EXIF orientation).
+    try:
+        if data[:8] == b"\x89PNG\r\n\x1a\n":
+            width, height = struct.unpack(">II", data[16:24])
+            return height, width
+
+        if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+            # int.from_bytes() does not fail on short slices: check the length first
+            if len(data) < 30:
+                return None
+            chunk = data[12:16]
+            if chunk == b"VP8 ":
+                width, height = struct.unpack("<HH", data[26:30])
+                return height & 0x3fff, width & 0x3fff
+            if chunk == b"VP8L":
+                bits = int.from_bytes(data[21:25], "little")
+                return ((bits >> 14) & 0x3fff) + 1, (bits & 0x3fff) + 1
+            if chunk == b"VP8X":
+                width = int.from_bytes(data[24:27], "little") + 1
+                height = int.from_bytes(data[27:30], "little") + 1
+                return height, width
+            return None
+
+        if data[:2] == b"\xff\xd8":
+            size = None
+            i = 2
+            while i + 4 <= len(data) and data[i] == 0xFF:
+                marker = data[i + 1]
+                if marker == 0xFF:
+                    i += 1
+                    continue
+                if marker == 0xDA:
+                    # Start of scan: no more header segments
+                    break
+                length, = struct.unpack(">H", data[i + 2:i + 4])
+                if marker == 0xE1 and _jpeg_orientation(data[i + 4:i + 2 + length]) != 1:
+                    return None
+                if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+                    size = struct.unpack(">HH", data[i + 5:i + 9])
+                i += 2 + length
+            return size
+    except struct.error:
+        return None
+    return None
+
+
+def _utcnow():
+    # google-auth expiries are naive UTC datetimes
+    return datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+
+
+def _token_identity(info):
+    # A key file replaced in place by another account's key must not reuse its token
+    return {
+        "client_email": info.get("client_email"),
+        "private_key_id": info.get("private_key_id"),
+    }
+
+
+def _read_token_cache():
+    # {credentials path: {"client_email": ..., "private_key_id": ..., "token": ..., "expiry": ...}}
+    try:
+        with open(_TOKEN_CACHE_PATH) as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return cache if isinstance(cache, dict) else {}
+
+
+def _save_token(path, info, creds):
+    now = _utcnow()
+    cache = {}
+    for key, entry in _read_token_cache().items():
+        # Drop expired tokens of other credentials
+        try:
+            if datetime.datetime.fromisoformat(entry["expiry"]) > now:
+                cache[key] = entry
+        except (TypeError, KeyError, ValueError):
+            pass
+
+    cache[path] = dict(_token_identity(info),
+                       token=creds.token,
+                       expiry=creds.expiry.isoformat())
+
+    cache_dir = os.path.dirname(_TOKEN_CACHE_PATH)
+    try:
+        os.makedirs(cache_dir, mode=0o700, exist_ok=True)
+        # The file holds bearer tokens: write an owner-only (0o600) temporary file
+        # and swap it in, so that an existing file never keeps wider permissions
+        fd, tmp_path = tempfile.mkstemp(dir=cache_dir, prefix=".google_vision_token.")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(cache, f)
+            os.replace(tmp_path, _TOKEN_CACHE_PATH)
+        except OSError:
+            os.remove(tmp_path)
+            raise
+    except OSError:
+        pass
+
+
+def _load_credentials(credentials):
+    path = credentials or os.environ.get("GOOGLE_APPLICATION_CREDENTIALS", "")
+    if not os.path.isfile(path):
+        return None
+
+    with open(path) as f:
+        info = json.load(f)
+    if info.get("type") != "service_account":
+        return None
+
+    path = os.path.abspath(path)
+    creds = service_account.Credentials.from_service_account_info(info, scopes=_TOKEN_SCOPES)
+
+    # Reuse the token minted by a previous process for the same account while it is
+    # still valid. Entries of another account are ignored, then replaced on refresh
+    entry = _read_token_cache().get(path)
+    if isinstance(entry, dict) and all(entry.get(k) == v for k, v in _token_identity(info).items()):
+        try:
+            # Parse before assigning: a token without expiry would be valid forever
+            token, expiry = entry["token"], datetime.datetime.fromisoformat(entry["expiry"])
+            creds.token, creds.expiry = token, expiry
+        except (TypeError, KeyError, ValueError):
+            pass
+
+    if not creds.valid:
+        creds.refresh(Request())
+        _save_token(path, info, creds)
+    return creds
+
+
+def _channel_credentials(credentials):
+    # Shared by sync and async clients: None lets google.auth find default credentials
+    if credentials:
+        os.environ['GOOGLE_APPLICATION_CREDENTIALS'] = credentials
+    return _load_credentials(credentials)
+
+
+def _get_client(credentials):
+    client = _CLIENT_CACHE.get(credentials)
+    if client is None:
+        channel = ImageAnnotatorGrpcTransport.create_channel(credentials=_channel_credentials(credentials),
+                                                             options=_CHANNEL_OPTIONS)
+        client = vision.ImageAnnotatorClient(transport=ImageAnnotatorGrpcTransport(channel=channel))
+        _CLIENT_CACHE[credentials] = client
+    return client
 
 
 # --------------------
@@ -11,25 +265,57 @@ import cv2
 # - Inherits PyCore.CWorkflowTaskParam from Ikomia API
 # --------------------
 class InferGoogleVisionOcrParam(core.CWorkflowTaskParam):
+    # No __slots__: Boost.Python instances are variable-sized (nonempty __slots__
+    # raises TypeError) and already carry a __dict__, so nothing would be saved
 
     def __init__(self):
         core.CWorkflowTaskParam.__init__(self)
         # Place default value initialization here
         self.google_application_credentials = ''
+        self.jpeg_quality = 80
+        self.use_source_file = False
+        self.cache_size = 128
+        self.dense_document = False
 
     def set_values(self, params):
         # Set parameters values from Ikomia Studio or API
         # Parameters values are stored as string and accessible like a python dict
         # Example : self.window_size = int(params["window_size"])
         self.google_application_credentials = str(params["google_application_credentials"])
+        # Workflows saved by earlier versions only hold the credentials
+        if "jpeg_quality" in params:
+            self.jpeg_quality = min(max(int(params["jpeg_quality"]), 1), 100)
+        if "use_source_file" in params:
+            self.use_source_file = utils.strtobool(params["use_source_file"])
+        if "cache_size" in params:
+            self.cache_size = int(params["cache_size"])
+        if "dense_document" in params:
+            self.dense_document = utils.strtobool(params["dense_document"])
 
     def get_values(self):
         # Send parameters values to Ikomia Studio or API
         # Create the specific dict structure (string container)
         params = {}
         params["google_application_credentials"] = str(self.google_application_credentials)
+        params["jpeg_quality"] = str(self.jpeg_quality)
+        params["use_source_file"] = str(self.use_source_file)
+        params["cache_size"] = str(self.cache_size)
+        params["dense_document"] = str(self.dense_document)
         return params
 
+    def __copy__(self):
+        # All values are immutable: a field by field copy is also a deep copy
+        new = InferGoogleVisionOcrParam()
+        new.google_application_credentials = self.google_application_credentials
+        new.jpeg_quality = self.jpeg_quality
+        new.use_source_file = self.use_source_file
+        new.cache_size = self.cache_size
+        new.dense_document = self.dense_document
+        return new
+
+    def __deepcopy__(self, memo):
+        return self.__copy__()
+
 
 # --------------------
 # - Class which implements the algorithm
@@ -52,45 +338,178 @@ class InferGoogleVisionOcr(dataprocess.C2dImageTask):
         self.client = None
         self.color = [255, 0, 0]
 
+        # Reusable destination buffer of the JPEG encoder
+        self._jpeg_buf = None
+        self._jpeg_shape = None
+
+        # Responses of already seen images (LRU), keyed by content hash
+        self._cache = OrderedDict()
+
     def get_progress_steps(self):
         # Function returning the number of progress steps for this algorithm
         # This is handled by the main progress bar of Ikomia Studio
         return 1
 
-    def run(self):
-        self.begin_task_run()
-
-        # Get input
-        input = self.get_input(0)
-        src_image = input.get_image()
+    def _encode(self, src_image):
+        channels = 1 if src_image.ndim == 2 else src_image.shape[2]
+        if channels not in _PIXEL_FORMATS:
+            raise ValueError(f"Unsupported number of image channels: {channels}")
 
-        # Get output :
-        text_output = self.get_output(1)
-        output_dict = self.get_output(2)
-        self.forward_input_image(0, 0)
-
-        # Get parameters
         param = self.get_param_object()
+        tj = _get_turbojpeg()
+        if tj is None:
+            if channels in _CV2_CONVERSIONS:
+                src_image = cv2.cvtColor(src_image, _CV2_CONVERSIONS[channels])
+            is_success, image_buffer = cv2.imencode(".jpg", src_image,
+                                                    [cv2.IMWRITE_JPEG_QUALITY, param.jpeg_quality])
+            if not is_success:
+                raise RuntimeError("JPEG encoding failed")
+            return image_buffer.tobytes()
+
+        pixel_format, subsample = _PIXEL_FORMATS[channels]
+        if channels == 1:
+            src_image = src_image.reshape(src_image.shape[:2])
+
+        # Reallocate the destination buffer only when image shape changes
+        if self._jpeg_buf is None or self._jpeg_shape != src_image.shape:
+            self._jpeg_buf = bytearray(tj.buffer_size(src_image, subsample))
+            self._jpeg_shape = src_image.shape
+
+        # Ikomia images are RGB: no channel reversal needed
+        _, size = tj.encode(src_image,
+                            quality=param.jpeg_quality,
+                            pixel_format=pixel_format,
+                            jpeg_subsample=subsample,
+                            dst=self._jpeg_buf)
+        return bytes(memoryview(self._jpeg_buf)[:size])
+
+    def _cache_get(self, key):
+        response = self._cache.get(key)
+        if response is not None:
+            self._cache.move_to_end(key)
+        return response
+
+    def _cache_put(self, key, response):
+        param = self.get_param_object()
+        if param.cache_size <= 0 or response.error.message:
+            return
+
+        self._cache[key] = response
+        while len(self._cache) > param.cache_size:
+            self._cache.popitem(last=False)
+
+    def _split_cached(self, keys, contents):
+        # Cached responses by key, and (key, content) pairs still to send:
+        # images that are neither cached nor duplicated in the list
+        responses = {}
+        pending = {}
+        for key, content in zip(keys, contents):
+            response = self._cache_get(key)
+            if response is not None:
+                responses[key] = response
+            elif key not in pending:
+                pending[key] = content
+
+        return responses, list(pending.items())
+
+    def _build_outputs(self, keys, responses):
+        outputs = []
+        for key in keys:
+            text_output = dataprocess.CTextIO()
+            output_dict = dataprocess.DataDictIO()
+            self._parse_response(responses[key], text_output, output_dict)
+            outputs.append((text_output, output_dict))
+
+        return outputs
+
+    def _read_source_file(self, path, src_image):
+        if not path or not path.lower().endswith(_SOURCE_FILE_EXTENSIONS):
+            return None
+        if not os.path.isfile(path) or os.path.getsize(path) > _MAX_CONTENT_SIZE:
+            return None
+
+        with open(path, "rb") as f:
+            data = f.read()
+
+        # The file must still match the input image: a resize, crop or rotation
+        # upstream (or a stale source path) falls back to encoding the input
+        if _image_size(data) != tuple(src_image.shape[:2]):
+            return None
+        return data
+
+    def _build_request(self, content):
+        # Dense document detection is heavier server side: request it only when asked
+        param = self.get_param_object()
+        if param.dense_document:
+            feature = vision.Feature.Type.DOCUMENT_TEXT_DETECTION
+        else:
+            feature = vision.Feature.Type.TEXT_DETECTION
 
-        if self.client is None:
-            if param.google_application_credentials:
-                os.environ['GOOGLE_APPLICATION_CREDENTIALS'] = param.google_application_credentials
-            self.client = vision.ImageAnnotatorClient()
-
-        # Convert the NumPy array to a byte stream
-        src_image = src_image[..., ::-1] # Convert to bgr
-        is_success, image_buffer = cv2.imencode(".jpg", src_image)
-        byte_stream = io.BytesIO(image_buffer)
-
-        # Add confidence score's parameter
-        ocr_detection_params = vision.TextDetectionParams(
-                                        enable_text_detection_confidence_score=True
+        # Raw JPEG bytes go straight into the Image message: no stream to read back
+        return vision.AnnotateImageRequest(
+                            image=vision.Image(content=content),
+                            features=[vision.Feature(type_=feature)],
+                            image_context=_IMAGE_CONTEXT
         )
-        image_context = vision.ImageContext(text_detection_params=ocr_detection_params)
 
-        # Infer
-        response = self.client.text_detection(image=byte_stream, image_context=image_context)
+    def _iter_words(self, response):
+        # All words of full_text_annotation: pages -> blocks -> paragraphs -> words
+        pages = response.full_text_annotation.pages
+        blocks = chain.from_iterable(page.blocks for page in pages)
+        paragraphs = chain.from_iterable(block.paragraphs for block in blocks)
+        return chain.from_iterable(paragraph.words for paragraph in paragraphs)
 
+    def _read_document_words(self, response):
+        # Walk words once: text, confidence and box vertices come from the same object
+        texts = []
+        scores = []
+        coords = []
+        # Bind bound methods to locals: the loop runs once per word
+        add_text = texts.append
+        add_score = scores.append
+        add_coords = coords.extend
+        join = "".join
+        for word in self._iter_words(response):
+            v = word.bounding_box.vertices
+            # Skip degenerate polygons: a box needs 4 vertices
+            if len(v) < 4:
+                continue
+            add_text(join([symbol.text for symbol in word.symbols]))
+            add_score(word.confidence)
+            add_coords((v[0].x, v[0].y, v[1].x, v[1].y, v[2].x, v[2].y, v[3].x, v[3].y))
+
+        return texts, scores, coords
+
+    def _read_text_annotations(self, response):
+        # Word confidences are only given in full_text_annotation (the text annotation
+        # field is deprecated and always 0): map them by the word's first vertex rather
+        # than relying on both lists being aligned. Unmatched words default to 1.0
+        bbox_to_conf = {}
+        for word in self._iter_words(response):
+            v = word.bounding_box.vertices
+            if len(v) < 4:
+                continue
+            bbox_to_conf[(v[0].x, v[0].y)] = word.confidence
+
+        # First annotation is the whole text, next ones are words
+        texts = []
+        scores = []
+        coords = []
+        add_text = texts.append
+        add_score = scores.append
+        add_coords = coords.extend
+        get_conf = bbox_to_conf.get
+        for text in response.text_annotations[1:]:
+            v = text.bounding_poly.vertices
+            if len(v) < 4:
+                continue
+            add_text(text.description)
+            add_score(get_conf((v[0].x, v[0].y), 1.0))
+            add_coords((v[0].x, v[0].y, v[1].x, v[1].y, v[2].x, v[2].y, v[3].x, v[3].y))
+
+        return texts, scores, coords
+
+    def _parse_response(self, response, text_output, output_dict):
         if response.error.message:
             raise Exception(
                 "{}\nFor more info on error messages, check: "
@@ -98,37 +517,31 @@ class InferGoogleVisionOcr(dataprocess.C2dImageTask):
         )
 
         # Set output dict
-        output_dict.data = {'Detected text': f'{response.text_annotations[0].description}'}
-
-        # Get confidence scores from response
-        scores = []
-        scores = [word.confidence
-                        for block in response.full_text_annotation.pages[0].blocks
-                        for paragraph in block.paragraphs
-                        for word in paragraph.words
-        ]
-
-        # Extract data and display output
         texts = response.text_annotations
-        for i, text in enumerate(texts[1:]):
-            word = f'{text.description}'
-            conf = scores[i]
+        output_dict.data = {'Detected text': texts[0].description if texts else ''}
 
-            # Get box coordinates
-            vertices = [(vertex.x,vertex.y) for vertex in text.bounding_poly.vertices]
+        param = self.get_param_object()
+        if param.dense_document:
+            texts, scores, coords = self._read_document_words(response)
+        else:
+            texts, scores, coords = self._read_text_annotations(response)
 
-            # Extract all the x-coordinates and y-coordinates
-            x_coords = [point[0] for point in vertices]
-            y_coords = [point[1] for point in vertices]
+        # Box coordinates of all words: (N, 4 vertices, x/y)
+        verts = np.array(coords, dtype=np.int32).reshape(-1, 4, 2)
 
-            # Calculate x1, y1, w, and h
-            x_box = min(x_coords)
-            y_box = min(y_coords)
-            w = max(x_coords) - x_box
-            h = max(y_coords) - y_box
+        # Calculate x1, y1, w, and h
+        x_boxes = verts[:, :, 0].min(axis=1)
+        y_boxes = verts[:, :, 1].min(axis=1)
+        widths = verts[:, :, 0].max(axis=1) - x_boxes
+        heights = verts[:, :, 1].max(axis=1) - y_boxes
 
+        # Extract data and display output
+        add_text_field = text_output.add_text_field
+        color = self.color
+        boxes = zip(x_boxes.tolist(), y_boxes.tolist(), widths.tolist(), heights.tolist())
+        for i, (word, conf, (x_box, y_box, w, h)) in enumerate(zip(texts, scores, boxes)):
             # Add text graphics object
-            text_output.add_text_field(
+            add_text_field(
                             id=i,
                             label="",
                             text=word,
@@ -137,9 +550,129 @@ class InferGoogleVisionOcr(dataprocess.C2dImageTask):
                             box_y=y_box,
                             box_width=w,
                             box_height=h,
-                            color=self.color
+                            color=color
             )
 
+    def run_batch(self, images):
+        # Run OCR on a list of images with as few requests as possible
+        # Return one (CTextIO, DataDictIO) pair per image
+        param = self.get_param_object()
+        self.client = _get_client(param.google_application_credentials)
+
+        contents = [self._encode(image) for image in images]
+        keys = [_content_key(content, param.dense_document) for content in contents]
+
+        responses, pending = self._split_cached(keys, contents)
+        for i in range(0, len(pending), _MAX_BATCH_SIZE):
+            chunk = pending[i:i + _MAX_BATCH_SIZE]
+            batch = self.client.batch_annotate_images(
+                                    requests=[self._build_request(content) for _, content in chunk]
+            )
+            for (key, _), response in zip(chunk, batch.responses):
+                responses[key] = response
+                self._cache_put(key, response)
+
+        return self._build_outputs(keys, responses)
+
+    @retry(wait=wait_exponential(min=1, max=30),
+           stop=stop_after_attempt(3),
+           retry=retry_if_exception_type(ResourceExhausted),
+           reraise=True)
+    async def _detect(self, client, content, sem, limiter):
+        # The async client has no text_detection() helper: send a one-image batch
+        request = self._build_request(content)
+        async with sem:
+            await limiter.acquire()
+            batch = await client.batch_annotate_images(requests=[request])
+        return batch.responses[0]
+
+    async def run_many_async(self, images, max_concurrency=8, requests_per_second=10):
+        # Run OCR on a list of images with concurrent requests
+        # Return one (CTextIO, DataDictIO) pair per image
+        param = self.get_param_object()
+        contents = [self._encode(image) for image in images]
+        keys = [_content_key(content, param.dense_document) for content in contents]
+        responses, pending = self._split_cached(keys, contents)
+
+        if pending:
+            # Token refresh is blocking HTTP: keep it off the event loop
+            loop = asyncio.get_running_loop()
+            creds = await loop.run_in_executor(None, _channel_credentials,
+                                               param.google_application_credentials)
+            # gRPC asyncio channels are bound to the running event loop
+            channel = ImageAnnotatorGrpcAsyncIOTransport.create_channel(credentials=creds,
+                                                                        options=_CHANNEL_OPTIONS)
+            client = vision.ImageAnnotatorAsyncClient(
+                                transport=ImageAnnotatorGrpcAsyncIOTransport(channel=channel)
+            )
+            sem = asyncio.Semaphore(max_concurrency)
+            limiter = AsyncLimiter(requests_per_second, 1)
+            try:
+                results = await asyncio.gather(*[self._detect(client, content, sem, limiter)
+                                                 for _, content in pending],
+                                               return_exceptions=True)
+            finally:
+                await client.transport.close()
+
+            # Cache every response received before an error is raised, like run_batch()
+            errors = []
+            for (key, _), result in zip(pending, results):
+                if isinstance(result, BaseException):
+                    errors.append(result)
+                else:
+                    responses[key] = result
+                    self._cache_put(key, result)
+            if errors:
+                raise errors[0]
+
+        return self._build_outputs(keys, responses)
+
+    def run_many(self, images, max_concurrency=8, requests_per_second=10):
+        # Blocking wrapper of run_many_async()
+        coro = self.run_many_async(images, max_concurrency, requests_per_second)
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(coro)
+
+        # An event loop already runs in this thread (Jupyter...): run in a worker thread
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            return executor.submit(asyncio.run, coro).result()
+
+    def run(self):
+        self.begin_task_run()
+
+        # Get input
+        input = self.get_input(0)
+        src_image = input.get_image()
+
+        # Get output :
+        text_output = self.get_output(1)
+        output_dict = self.get_output(2)
+        self.forward_input_image(0, 0)
+
+        # Get parameters
+        param = self.get_param_object()
+
+        self.client = _get_client(param.google_application_credentials)
+
+        # Upload the original file when possible, encode the RGB image to JPEG otherwise
+        content = None
+        if param.use_source_file:
+            content = self._read_source_file(input.source_file_path, src_image)
+        if content is None:
+            content = self._encode(src_image)
+
+        # Infer, unless the same image has just been processed
+        key = _content_key(content, param.dense_document)
+        response = self._cache_get(key)
+        if response is None:
+            response = self.client.annotate_image(self._build_request(content))
+            self._cache_put(key, response)
+
+        # Extract data and display output
+        self._parse_response(response, text_output, output_dict)
+
         # Step progress bar (Ikomia Studio):
         self.emit_step_progress()
 
@@ -33,6 +33,38 @@ class InferGoogleVisionOcrWidget(core.CWorkflowTaskWidget):
                                             mode=QFileDialog.ExistingFile
         )
 
+        # JPEG quality of uploaded images
+        self.spin_jpeg_quality = pyqtutils.append_spin(
+                                            grid_layout=self.grid_layout,
+                                            label="JPEG quality",
+                                            value=self.parameters.jpeg_quality,
+                                            min=1,
+                                            max=100
+        )
+
+        # Upload original image file
+        self.check_use_source_file = pyqtutils.append_check(
+                                            grid_layout=self.grid_layout,
+                                            label="Upload source image file",
+                                            checked=self.parameters.use_source_file
+        )
+
+        # Number of responses kept for already seen images
+        self.spin_cache_size = pyqtutils.append_spin(
+                                            grid_layout=self.grid_layout,
+                                            label="Cache size",
+                                            value=self.parameters.cache_size,
+                                            min=0,
+                                            max=4096
+        )
+
+        # Dense document text detection
+        self.check_dense_document = pyqtutils.append_check(
+                                            grid_layout=self.grid_layout,
+                                            label="Dense document",
+                                            checked=self.parameters.dense_document
+        )
+
         # Set widget layout
         self.set_layout(layout_ptr)
 
@@ -41,6 +73,10 @@ class InferGoogleVisionOcrWidget(core.CWorkflowTaskWidget):
 
         # Get parameters from widget
         self.parameters.google_application_credentials = self.browse_credentials.path
+        self.parameters.jpeg_quality = self.spin_jpeg_quality.value()
+        self.parameters.use_source_file = self.check_use_source_file.isChecked()
+        self.parameters.cache_size = self.spin_cache_size.value()
+        self.parameters.dense_document = self.check_dense_document.isChecked()
 
         # Send signal to launch the algorithm main function
         self.emit_apply(self.parameters)
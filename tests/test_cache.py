@@ -0,0 +1,114 @@
+import pytest
+
+vision = pytest.importorskip("google.cloud.vision")
+process = pytest.importorskip("infer_google_vision_ocr_process")
+
+
+class _Client:
+    # Fake Vision client: the text found in an image is its content,
+    # b"error" images get an error response
+
+    def __init__(self):
+        self.batches = []
+
+    def batch_annotate_images(self, requests):
+        contents = [request.image.content for request in requests]
+        self.batches.append(contents)
+        responses = []
+        for content in contents:
+            if content == b"error":
+                responses.append(vision.AnnotateImageResponse(error={"message": "Bad image data."}))
+            else:
+                text = vision.EntityAnnotation(description=content.decode())
+                responses.append(vision.AnnotateImageResponse(text_annotations=[text]))
+        return vision.BatchAnnotateImagesResponse(responses=responses)
+
+    @property
+    def sent(self):
+        return [content for batch in self.batches for content in batch]
+
+
+@pytest.fixture
+def client(monkeypatch):
+    client = _Client()
+    monkeypatch.setitem(process._CLIENT_CACHE, "", client)
+    return client
+
+
+@pytest.fixture
+def task():
+    task = process.InferGoogleVisionOcr("infer_google_vision_ocr", None)
+    # Images are their own encoded content
+    task._encode = lambda image: image
+    return task
+
+
+def _texts(outputs):
+    return [output_dict.data["Detected text"] for _, output_dict in outputs]
+
+
+def test_cached_images_are_not_sent_again(task, client):
+    assert _texts(task.run_batch([b"a", b"b"])) == ["a", "b"]
+    assert _texts(task.run_batch([b"b", b"a", b"c"])) == ["b", "a", "c"]
+
+    assert client.sent == [b"a", b"b", b"c"]
+
+
+def test_lru_eviction(task, client):
+    task.get_param_object().cache_size = 2
+
+    task.run_batch([b"a"])
+    task.run_batch([b"b"])
+    # Touch a: b becomes the least recently used
+    task.run_batch([b"a"])
+    task.run_batch([b"c"])
+    assert len(task._cache) == 2
+
+    task.run_batch([b"a"])
+    assert client.sent == [b"a", b"b", b"c"]
+    task.run_batch([b"b"])
+    assert client.sent == [b"a", b"b", b"c", b"b"]
+
+
+def test_cache_disabled(task, client):
+    task.get_param_object().cache_size = 0
+
+    task.run_batch([b"a"])
+    task.run_batch([b"a"])
+
+    assert client.sent == [b"a", b"a"]
+    assert len(task._cache) == 0
+
+
+def test_errors_are_not_cached(task, client):
+    with pytest.raises(Exception, match="Bad image data."):
+        task.run_batch([b"a", b"error"])
+
+    # The successful response of the same batch is kept
+    assert _texts(task.run_batch([b"a"])) == ["a"]
+    with pytest.raises(Exception, match="Bad image data."):
+        task.run_batch([b"error"])
+    assert client.sent == [b"a", b"error", b"error"]
+
+
+def test_keys_differ_between_modes(task, client):
+    assert process._content_key(b"a", False) != process._content_key(b"a", True)
+
+    task.run_batch([b"a"])
+    task.get_param_object().dense_document = True
+    task.run_batch([b"a"])
+    task.get_param_object().dense_document = False
+    task.run_batch([b"a"])
+
+    assert client.sent == [b"a", b"a"]
+
+
+def test_run_batch_duplicates_and_chunks(task, client):
+    images = [str(i).encode() for i in range(20)]
+    images.insert(5, images[2])
+
+    outputs = task.run_batch(images)
+
+    assert _texts(outputs) == [image.decode() for image in images]
+    assert [len(batch) for batch in client.batches] == [16, 4]
+    assert sorted(client.sent) == sorted(set(images))
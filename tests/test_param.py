@@ -0,0 +1,42 @@
+import copy
+
+import pytest
+
+process = pytest.importorskip("infer_google_vision_ocr_process")
+
+
+def _param():
+    param = process.InferGoogleVisionOcrParam()
+    param.set_values({
+        "google_application_credentials": "/path/to/key.json",
+        "jpeg_quality": "95",
+        "use_source_file": "True",
+        "cache_size": "16",
+        "dense_document": "True",
+    })
+    return param
+
+
+def test_non_default_values():
+    # Every field differs from its default, so a copy falling back on defaults is caught
+    default = process.InferGoogleVisionOcrParam().get_values()
+    values = _param().get_values()
+
+    assert values.keys() == default.keys()
+    for key in values:
+        assert values[key] != default[key], key
+
+
+@pytest.mark.parametrize("copier", [copy.copy, copy.deepcopy])
+def test_copy_keeps_values(copier):
+    param = _param()
+
+    assert copier(param).get_values() == param.get_values()
+
+
+def test_copy_is_independent():
+    param = _param()
+    param_copy = copy.deepcopy(param)
+    param_copy.cache_size = 0
+
+    assert param.cache_size == 16
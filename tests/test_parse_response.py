@@ -0,0 +1,126 @@
+import pytest
+
+vision = pytest.importorskip("google.cloud.vision")
+process = pytest.importorskip("infer_google_vision_ocr_process")
+
+
+class _TextOutput:
+
+    def __init__(self):
+        self.fields = []
+
+    def add_text_field(self, **kwargs):
+        self.fields.append(kwargs)
+
+
+class _DictOutput:
+
+    def __init__(self):
+        self.data = None
+
+
+def _poly(x, y, w=10, h=5):
+    return vision.BoundingPoly(vertices=[vision.Vertex(x=x, y=y),
+                                         vision.Vertex(x=x + w, y=y),
+                                         vision.Vertex(x=x + w, y=y + h),
+                                         vision.Vertex(x=x, y=y + h)])
+
+
+def _response(words, document_words=None):
+    # words: list of (text, confidence, x, y)
+    if document_words is None:
+        document_words = words
+
+    text_annotations = []
+    if words:
+        text_annotations.append(vision.EntityAnnotation(description=" ".join(w[0] for w in words)))
+        text_annotations += [vision.EntityAnnotation(description=text, bounding_poly=_poly(x, y))
+                             for text, _, x, y in words]
+
+    paragraph = vision.Paragraph(words=[vision.Word(symbols=[vision.Symbol(text=c) for c in text],
+                                                    confidence=conf,
+                                                    bounding_box=_poly(x, y))
+                                        for text, conf, x, y in document_words])
+    page = vision.Page(blocks=[vision.Block(paragraphs=[paragraph])])
+    return vision.AnnotateImageResponse(text_annotations=text_annotations,
+                                        full_text_annotation=vision.TextAnnotation(pages=[page]))
+
+
+def _parse(response, dense_document=False):
+    task = process.InferGoogleVisionOcr("infer_google_vision_ocr", None)
+    task.get_param_object().dense_document = dense_document
+    text_output = _TextOutput()
+    output_dict = _DictOutput()
+    task._parse_response(response, text_output, output_dict)
+    return text_output.fields, output_dict.data
+
+
+WORDS = [("HELLO", 0.9, 10, 20), ("WORLD", 0.5, 40, 20)]
+
+
+@pytest.mark.parametrize("dense_document", [False, True])
+def test_words(dense_document):
+    fields, data = _parse(_response(WORDS), dense_document)
+
+    assert data == {"Detected text": "HELLO WORLD"}
+    assert [f["text"] for f in fields] == ["HELLO", "WORLD"]
+    assert [f["confidence"] for f in fields] == pytest.approx([0.9, 0.5])
+    assert [(f["box_x"], f["box_y"], f["box_width"], f["box_height"]) for f in fields] == \
+           [(10, 20, 10, 5), (40, 20, 10, 5)]
+    assert [f["id"] for f in fields] == [0, 1]
+
+
+@pytest.mark.parametrize("dense_document", [False, True])
+def test_empty_response(dense_document):
+    fields, data = _parse(vision.AnnotateImageResponse(), dense_document)
+
+    assert data == {"Detected text": ""}
+    assert fields == []
+
+
+def test_dense_document_reads_document_words():
+    response = _response(WORDS)
+    del response.text_annotations[1:]
+
+    fields, _ = _parse(response, dense_document=True)
+    assert [f["text"] for f in fields] == ["HELLO", "WORLD"]
+
+    fields, _ = _parse(response, dense_document=False)
+    assert fields == []
+
+
+def test_misordered_document_words():
+    fields, _ = _parse(_response(WORDS, document_words=WORDS[::-1]))
+
+    assert [f["text"] for f in fields] == ["HELLO", "WORLD"]
+    assert [f["confidence"] for f in fields] == pytest.approx([0.9, 0.5])
+
+
+def test_missing_document_word():
+    fields, _ = _parse(_response(WORDS, document_words=WORDS[:1]))
+
+    assert [f["text"] for f in fields] == ["HELLO", "WORLD"]
+    assert [f["confidence"] for f in fields] == pytest.approx([0.9, 1.0])
+
+
+def test_zero_confidence_is_kept():
+    fields, _ = _parse(_response([("HELLO", 0.0, 10, 20)]))
+
+    assert fields[0]["confidence"] == 0.0
+
+
+@pytest.mark.parametrize("dense_document", [False, True])
+def test_degenerate_polygon_is_skipped(dense_document):
+    response = _response(WORDS)
+    response.text_annotations[1].bounding_poly.vertices.clear()
+    response.full_text_annotation.pages[0].blocks[0].paragraphs[0].words[0].bounding_box.vertices.clear()
+    fields, _ = _parse(response, dense_document)
+
+    assert [f["text"] for f in fields] == ["WORLD"]
+
+
+def test_error_response():
+    response = vision.AnnotateImageResponse(error={"message": "Bad image data."})
+
+    with pytest.raises(Exception, match="Bad image data."):
+        _parse(response)
@@ -0,0 +1,160 @@
+import asyncio
+
+import pytest
+
+vision = pytest.importorskip("google.cloud.vision")
+process = pytest.importorskip("infer_google_vision_ocr_process")
+from google.api_core.exceptions import ResourceExhausted
+
+
+class _Transport:
+
+    def __init__(self, channel):
+        self.closed = False
+
+    @staticmethod
+    def create_channel(**kwargs):
+        return None
+
+    async def close(self):
+        self.closed = True
+
+
+class _AsyncClient:
+    # Fake async Vision client: the text found in an image is its content.
+    # failures maps a content to the number of ResourceExhausted raised first.
+
+    def __init__(self, failures=None):
+        self.failures = dict(failures or {})
+        self.calls = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.transports = []
+
+    def __call__(self, transport):
+        self.transports.append(transport)
+        return self
+
+    @property
+    def transport(self):
+        return self.transports[-1]
+
+    async def batch_annotate_images(self, requests):
+        content = requests[0].image.content
+        self.calls.append(content)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(0.01)
+            if self.failures.get(content, 0):
+                self.failures[content] -= 1
+                raise ResourceExhausted("quota")
+        finally:
+            self.in_flight -= 1
+
+        text = vision.EntityAnnotation(description=content.decode())
+        return vision.BatchAnnotateImagesResponse(
+                    responses=[vision.AnnotateImageResponse(text_annotations=[text])]
+        )
+
+
+class _Limiter:
+
+    instances = []
+
+    def __init__(self, max_rate, time_period):
+        self.args = (max_rate, time_period)
+        self.acquired = 0
+        _Limiter.instances.append(self)
+
+    async def acquire(self):
+        self.acquired += 1
+
+
+@pytest.fixture
+def task(monkeypatch):
+    async def no_sleep(seconds):
+        pass
+
+    monkeypatch.setattr(process, "ImageAnnotatorGrpcAsyncIOTransport", _Transport)
+    monkeypatch.setattr(process, "_channel_credentials", lambda credentials: None)
+    monkeypatch.setattr(process, "AsyncLimiter", _Limiter)
+    monkeypatch.setattr(process.InferGoogleVisionOcr._detect.retry, "sleep", no_sleep)
+    _Limiter.instances.clear()
+
+    task = process.InferGoogleVisionOcr("infer_google_vision_ocr", None)
+    # Images are their own encoded content
+    task._encode = lambda image: image
+    return task
+
+
+@pytest.fixture
+def client_factory(monkeypatch):
+    def factory(failures=None):
+        client = _AsyncClient(failures)
+        monkeypatch.setattr(process.vision, "ImageAnnotatorAsyncClient", client)
+        return client
+    return factory
+
+
+def _texts(outputs):
+    return [output_dict.data["Detected text"] for _, output_dict in outputs]
+
+
+def test_retry_on_resource_exhausted(task, client_factory):
+    client = client_factory({b"a": 2})
+
+    outputs = task.run_many([b"a", b"b"])
+
+    assert _texts(outputs) == ["a", "b"]
+    assert client.calls.count(b"a") == 3
+    assert client.transport.closed
+
+
+def test_failure_keeps_other_responses(task, client_factory):
+    client = client_factory({b"bad": 10})
+
+    with pytest.raises(ResourceExhausted):
+        task.run_many([b"good", b"bad"])
+    # Attempts are bounded by stop_after_attempt(3)
+    assert client.calls.count(b"bad") == 3
+    assert client.transport.closed
+
+    client = client_factory()
+    assert _texts(task.run_many([b"good"])) == ["good"]
+    assert client.calls == []
+
+
+def test_concurrency_and_rate_limit(task, client_factory):
+    client = client_factory()
+    images = [str(i).encode() for i in range(10)]
+
+    outputs = task.run_many(images, max_concurrency=3, requests_per_second=5)
+
+    assert _texts(outputs) == [image.decode() for image in images]
+    assert client.max_in_flight == 3
+    limiter, = _Limiter.instances
+    assert limiter.args == (5, 1)
+    assert limiter.acquired == 10
+
+
+def test_duplicates_are_sent_once(task, client_factory):
+    client = client_factory()
+
+    assert _texts(task.run_many([b"a", b"a", b"b"])) == ["a", "a", "b"]
+    assert sorted(client.calls) == [b"a", b"b"]
+
+
+def test_run_many_inside_running_loop(task, client_factory):
+    client_factory()
+
+    async def main():
+        return task.run_many([b"a"])
+
+    assert _texts(asyncio.run(main())) == ["a"]
+
+
+def test_run_many_async(task, client_factory):
+    client_factory()
+
+    assert _texts(asyncio.run(task.run_many_async([b"a"]))) == ["a"]
@@ -0,0 +1,137 @@
+import struct
+
+import numpy as np
+import pytest
+
+cv2 = pytest.importorskip("cv2")
+process = pytest.importorskip("infer_google_vision_ocr_process")
+
+HEIGHT, WIDTH = 45, 123
+IMAGE = np.random.RandomState(0).randint(0, 255, (HEIGHT, WIDTH, 3), dtype=np.uint8)
+
+
+def _encode(ext, params=()):
+    is_success, buffer = cv2.imencode(ext, IMAGE, list(params))
+    assert is_success
+    return buffer.tobytes()
+
+
+def _exif_segment(orientation, order=b"II"):
+    fmt = "<" if order == b"II" else ">"
+    tiff = order + struct.pack(fmt + "HI", 42, 8)
+    tiff += struct.pack(fmt + "H", 1)
+    tiff += struct.pack(fmt + "HHIHH", 0x0112, 3, 1, orientation, 0)
+    tiff += struct.pack(fmt + "I", 0)
+    payload = b"Exif\x00\x00" + tiff
+    return b"\xff\xe1" + struct.pack(">H", len(payload) + 2) + payload
+
+
+def _with_exif(jpeg, segment):
+    # APP1 right after SOI
+    return jpeg[:2] + segment + jpeg[2:]
+
+
+def _vp8x(width, height):
+    payload = b"\x00\x00\x00\x00" + (width - 1).to_bytes(3, "little") + (height - 1).to_bytes(3, "little")
+    chunk = b"VP8X" + struct.pack("<I", len(payload)) + payload
+    return b"RIFF" + struct.pack("<I", 4 + len(chunk)) + b"WEBP" + chunk
+
+
+@pytest.mark.parametrize("data", [
+    pytest.param(_encode(".png"), id="png"),
+    pytest.param(_encode(".jpg"), id="jpeg"),
+    pytest.param(_encode(".jpg", (cv2.IMWRITE_JPEG_PROGRESSIVE, 1)), id="progressive-jpeg"),
+    pytest.param(_encode(".webp", (cv2.IMWRITE_WEBP_QUALITY, 80)), id="webp-vp8"),
+    pytest.param(_encode(".webp", (cv2.IMWRITE_WEBP_QUALITY, 101)), id="webp-vp8l"),
+    pytest.param(_vp8x(WIDTH, HEIGHT), id="webp-vp8x"),
+])
+def test_image_size(data):
+    assert process._image_size(data) == (HEIGHT, WIDTH)
+
+
+def test_webp_formats():
+    assert _encode(".webp", (cv2.IMWRITE_WEBP_QUALITY, 80))[12:16] == b"VP8 "
+    assert _encode(".webp", (cv2.IMWRITE_WEBP_QUALITY, 101))[12:16] == b"VP8L"
+
+
+@pytest.mark.parametrize("order", [b"II", b"MM"])
+def test_jpeg_exif_orientation(order):
+    jpeg = _encode(".jpg")
+
+    assert process._image_size(_with_exif(jpeg, _exif_segment(1, order))) == (HEIGHT, WIDTH)
+    assert process._image_size(_with_exif(jpeg, _exif_segment(6, order))) is None
+    assert process._image_size(_with_exif(jpeg, _exif_segment(3, order))) is None
+
+
+def test_jpeg_corrupt_exif():
+    segment = bytearray(_exif_segment(6))
+    # IFD offset pointing past the segment
+    segment[14:18] = struct.pack("<I", 1000)
+
+    assert process._jpeg_orientation(bytes(segment[4:])) is None
+    assert process._image_size(_with_exif(_encode(".jpg"), bytes(segment))) is None
+
+
+@pytest.mark.parametrize("data", [
+    pytest.param(_encode(".png")[:20], id="png"),
+    pytest.param(_encode(".jpg")[:100], id="jpeg"),
+    pytest.param(_encode(".jpg")[:2], id="jpeg-soi-only"),
+    pytest.param(_encode(".webp", (cv2.IMWRITE_WEBP_QUALITY, 80))[:28], id="webp-vp8"),
+    pytest.param(_encode(".webp", (cv2.IMWRITE_WEBP_QUALITY, 101))[:22], id="webp-vp8l"),
+    pytest.param(_vp8x(WIDTH, HEIGHT)[:26], id="webp-vp8x"),
+])
+def test_truncated_header(data):
+    assert process._image_size(data) is None
+
+
+@pytest.mark.parametrize("data", [
+    pytest.param(b"", id="empty"),
+    pytest.param(b"not an image at all, just some bytes", id="text"),
+    pytest.param(b"\xff\xd8\x00\x01\x02\x03\x04\x05" * 4, id="jpeg-bad-marker"),
+    pytest.param(b"RIFF\x00\x00\x00\x00WEBPABCD" + bytes(20), id="webp-unknown-chunk"),
+    pytest.param(_encode(".bmp"), id="bmp"),
+])
+def test_unknown_or_corrupt_data(data):
+    assert process._image_size(data) is None
+
+
+@pytest.fixture
+def task():
+    return process.InferGoogleVisionOcr("infer_google_vision_ocr", None)
+
+
+@pytest.mark.parametrize("ext", [".png", ".jpg", ".webp"])
+def test_read_source_file(task, tmp_path, ext):
+    path = str(tmp_path / ("image" + ext))
+    cv2.imwrite(path, IMAGE)
+
+    with open(path, "rb") as f:
+        assert task._read_source_file(path, IMAGE) == f.read()
+
+
+def test_read_source_file_size_mismatch(task, tmp_path):
+    path = str(tmp_path / "image.png")
+    cv2.imwrite(path, IMAGE)
+
+    assert task._read_source_file(path, IMAGE[:, :-1]) is None
+    assert task._read_source_file(path, IMAGE.transpose(1, 0, 2)) is None
+
+
+def test_read_source_file_rotated_jpeg(task, tmp_path):
+    path = tmp_path / "image.jpg"
+    path.write_bytes(_with_exif(_encode(".jpg"), _exif_segment(6)))
+
+    assert task._read_source_file(str(path), IMAGE) is None
+
+
+def test_read_source_file_unusable_paths(task, tmp_path, monkeypatch):
+    bmp = str(tmp_path / "image.bmp")
+    cv2.imwrite(bmp, IMAGE)
+    assert task._read_source_file(bmp, IMAGE) is None
+    assert task._read_source_file("", IMAGE) is None
+    assert task._read_source_file(str(tmp_path / "missing.png"), IMAGE) is None
+
+    png = str(tmp_path / "image.png")
+    cv2.imwrite(png, IMAGE)
+    monkeypatch.setattr(process, "_MAX_CONTENT_SIZE", 10)
+    assert task._read_source_file(png, IMAGE) is None
@@ -0,0 +1,137 @@
+import datetime
+import json
+import os
+import stat
+import sys
+
+import pytest
+
+process = pytest.importorskip("infer_google_vision_ocr_process")
+
+
+class _Creds:
+
+    def __init__(self, token, expiry):
+        self.token = token
+        self.expiry = expiry
+
+
+def _in(hours):
+    return process._utcnow() + datetime.timedelta(hours=hours)
+
+
+INFO = {"client_email": "ocr@project.iam.gserviceaccount.com", "private_key_id": "key1"}
+
+
+@pytest.fixture
+def cache_path(tmp_path, monkeypatch):
+    path = tmp_path / "ikomia" / "google_vision_token.json"
+    monkeypatch.setattr(process, "_TOKEN_CACHE_PATH", str(path))
+    return path
+
+
+@pytest.fixture
+def key_file(tmp_path):
+    serialization = pytest.importorskip("cryptography.hazmat.primitives.serialization")
+    rsa = pytest.importorskip("cryptography.hazmat.primitives.asymmetric.rsa")
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    pem = key.private_bytes(serialization.Encoding.PEM,
+                            serialization.PrivateFormat.PKCS8,
+                            serialization.NoEncryption()).decode()
+    path = tmp_path / "key.json"
+    path.write_text(json.dumps(dict(INFO,
+                                    type="service_account",
+                                    private_key=pem,
+                                    token_uri="https://oauth2.googleapis.com/token")))
+    return str(path)
+
+
+@pytest.fixture
+def refreshes(monkeypatch):
+    calls = []
+
+    def refresh(self, request):
+        calls.append(self)
+        self.token = "fresh"
+        self.expiry = _in(1)
+
+    monkeypatch.setattr(process.service_account.Credentials, "refresh", refresh)
+    return calls
+
+
+def test_save_and_read(cache_path):
+    expiry = _in(1)
+    process._save_token("/a.json", INFO, _Creds("token_a", expiry))
+    process._save_token("/b.json", INFO, _Creds("token_b", expiry))
+
+    cache = process._read_token_cache()
+    assert set(cache) == {"/a.json", "/b.json"}
+    assert cache["/a.json"] == dict(INFO, token="token_a", expiry=expiry.isoformat())
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="POSIX permissions")
+def test_owner_only_permissions(cache_path):
+    cache_path.parent.mkdir()
+    cache_path.write_text("{}")
+    os.chmod(cache_path, 0o644)
+
+    process._save_token("/a.json", INFO, _Creds("token", _in(1)))
+
+    assert stat.S_IMODE(os.stat(cache_path).st_mode) == 0o600
+    assert os.listdir(cache_path.parent) == [cache_path.name]
+
+
+def test_expired_entries_are_dropped(cache_path):
+    process._save_token("/old.json", INFO, _Creds("old", _in(-1)))
+    process._save_token("/new.json", INFO, _Creds("new", _in(1)))
+
+    assert set(process._read_token_cache()) == {"/new.json"}
+
+
+@pytest.mark.parametrize("content", ["not json", "[1, 2]", '{"/a.json": "no entry"}'])
+def test_corrupt_cache_file(cache_path, content):
+    cache_path.parent.mkdir()
+    cache_path.write_text(content)
+
+    process._save_token("/b.json", INFO, _Creds("token", _in(1)))
+
+    assert set(process._read_token_cache()) == {"/b.json"}
+
+
+def test_load_reuses_valid_token(cache_path, key_file, refreshes):
+    process._save_token(os.path.abspath(key_file), INFO, _Creds("cached", _in(1)))
+
+    creds = process._load_credentials(key_file)
+
+    assert creds.token == "cached"
+    assert refreshes == []
+    assert tuple(creds.scopes) == process._TOKEN_SCOPES
+
+
+def test_load_refreshes_expired_token(cache_path, key_file, refreshes):
+    process._save_token(os.path.abspath(key_file), INFO, _Creds("cached", _in(-1)))
+
+    creds = process._load_credentials(key_file)
+
+    assert creds.token == "fresh"
+    assert len(refreshes) == 1
+    assert process._read_token_cache()[os.path.abspath(key_file)]["token"] == "fresh"
+
+
+def test_load_ignores_token_of_another_account(cache_path, key_file, refreshes):
+    other = dict(INFO, private_key_id="key0")
+    process._save_token(os.path.abspath(key_file), other, _Creds("other", _in(1)))
+
+    creds = process._load_credentials(key_file)
+
+    assert creds.token == "fresh"
+    assert process._read_token_cache()[os.path.abspath(key_file)] == \
+           dict(INFO, token="fresh", expiry=creds.expiry.isoformat())
+
+
+def test_load_skips_other_credential_types(cache_path, tmp_path, refreshes):
+    path = tmp_path / "user.json"
+    path.write_text(json.dumps({"type": "authorized_user"}))
+
+    assert process._load_credentials(str(path)) is None
+    assert not cache_path.exists()